@@ -2,17 +2,43 @@
 
 __version__ = "0.1.0"
 
+# Names resolved lazily from .core on first access
+__all__ = [
+    'generate_isolation_svg',
+    'generate_edge_cuts_svg',
+    'generate_drill_holes_svg',
+    'generate_solder_mask_svg',
+    'generate_user_comments_svg',
+    'generate_multi_color_svg',
+    'generate_multi_color_svg_back'
+]
+
+# Static analyzers don't follow __getattr__, so give them the real imports.
+# Type checkers treat any name called TYPE_CHECKING as true, so this costs
+# nothing at runtime, unlike importing typing on every package import.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .core import (
+        generate_isolation_svg,
+        generate_edge_cuts_svg,
+        generate_drill_holes_svg,
+        generate_solder_mask_svg,
+        generate_user_comments_svg,
+        generate_multi_color_svg,
+        generate_multi_color_svg_back
+    )
+
 # Lazy imports - core requires pcbnew which needs KiCad's Python
 def __getattr__(name):
-    if name in (
-        'generate_isolation_svg',
-        'generate_edge_cuts_svg',
-        'generate_drill_holes_svg',
-        'generate_solder_mask_svg',
-        'generate_user_comments_svg',
-        'generate_multi_color_svg',
-        'generate_multi_color_svg_back'
-    ):
+    if name in __all__:
         from . import core
-        return getattr(core, name)
-    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
+        value = getattr(core, name)
+        # Cache so later lookups bypass __getattr__ entirely
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    # List lazy names without importing core
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,24 @@
+"""
+Print the path of KiCad's Python interpreter as discovered by kigadgets.
+
+Run as a short-lived child by cli.get_kicad_python_path() so kigadgets
+never gets imported into the CLI process itself.
+"""
+
+import os
+
+# Keep a handle on the real stdout, then silence everything else at file
+# descriptor level (kigadgets may bypass Python's stdout/stderr)
+result_fd = os.dup(1)
+devnull = os.open(os.devnull, os.O_WRONLY)
+os.dup2(devnull, 1)
+os.dup2(devnull, 2)
+
+try:
+    from kigadgets.environment import get_default_paths
+    kipython_paths = get_default_paths().get('kipython', [])
+except Exception:
+    kipython_paths = []
+
+if kipython_paths:
+    os.write(result_fd, str(kipython_paths[0]).encode())
@@ -5,90 +5,143 @@ Command-line interface for PCB Isolation Router.
 Supports automatic re-execution with KiCad's Python if needed.
 """
 
-import argparse
+# Only lightweight imports at module level: the parent process usually
+# re-execs under KiCad's Python before anything else is needed
+import functools
 import os
 import subprocess
 import sys
-from pathlib import Path
 
 
+# Environment variable carrying an already-discovered KiCad Python path
+KIPY_ENV_VAR = 'KICAD_LASER_TRACER_KIPY'
+
+# Environment variable opting in to the persistent worker daemon
+DAEMON_ENV_VAR = 'KICAD_LASER_TRACER_DAEMON'
+
+
+def kipython_cache_path():
+    """Return the per-user file remembering the discovered KiCad Python path."""
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_dir, 'kicad-laser-tracer', 'kipython')
+
+
+@functools.lru_cache(maxsize=1)
 def get_kicad_python_path():
     """Use kigadgets to discover KiCad's Python interpreter path."""
-    # Suppress kigadgets' verbose output at file descriptor level
-    # (kigadgets may bypass Python's stdout/stderr)
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    old_stdout = os.dup(1)
-    old_stderr = os.dup(2)
-
+    # A path handed down by a parent process (or set by the user) skips
+    # the kigadgets import entirely
+    cached = os.environ.get(KIPY_ENV_VAR)
+    if cached and os.path.exists(cached):
+        return cached
+
+    # Then the path remembered by an earlier run, as long as it still exists
+    cache_file = kipython_cache_path()
+    try:
+        with open(cache_file) as f:
+            cached = f.read().strip()
+    except OSError:
+        cached = None
+    if cached and os.path.exists(cached):
+        return cached
+
+    # Probe in a throwaway child so kigadgets' module-level side effects
+    # (and its chatty output) never touch this process
+    probe = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_probe_kipython.py')
     try:
-        os.dup2(devnull, 1)
-        os.dup2(devnull, 2)
-
-        from kigadgets.environment import get_default_paths
-        paths = get_default_paths()
-        kipython_paths = paths.get('kipython', [])
-        if kipython_paths:
-            return kipython_paths[0]
-    except Exception:
-        pass
-    finally:
-        os.dup2(old_stdout, 1)
-        os.dup2(old_stderr, 2)
-        os.close(devnull)
-        os.close(old_stdout)
-        os.close(old_stderr)
-
-    return None
+        # -E keeps PYTHONPATH and other PYTHON* variables out of the probe.
+        # Not -I: that also drops the user site, where a
+        # `pip install --user kigadgets` lives.
+        # close_fds=False lets CPython take its posix_spawn/vfork fast path
+        result = subprocess.run(
+            [sys.executable, '-E', probe],
+            capture_output=True, close_fds=False, text=True
+        )
+    except OSError:
+        return None
+
+    kicad_python = result.stdout.strip() or None
+    if kicad_python:
+        # Best effort: an unwritable cache only means probing again next run
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(cache_file, 'w') as f:
+                f.write(kicad_python)
+        except OSError:
+            pass
+
+    return kicad_python
 
 
 def is_running_with_kicad_python():
     """Check if we're running with KiCad's Python by comparing executable paths."""
+    # get_kicad_python_path() answers from KICAD_LASER_TRACER_KIPY without
+    # probing kigadgets when a parent process already discovered it
     kicad_python = get_kicad_python_path()
     if not kicad_python:
         return False
 
-    # Compare resolved paths
-    current_python = Path(sys.executable).resolve()
-    kicad_python_path = Path(kicad_python).resolve()
+    # Plain string match first; resolve() stats every path component
+    if sys.executable == kicad_python:
+        return True
 
     # Check if we're running KiCad's Python (or a symlink to it)
-    return current_python == kicad_python_path
+    return os.path.realpath(sys.executable) == os.path.realpath(kicad_python)
 
 
-def reexec_with_kicad_python():
-    """Re-execute this script with KiCad's Python."""
+class KiCadPythonNotFoundError(Exception):
+    """KiCad's Python interpreter could not be located."""
+
+
+def build_kicad_python_command(argv=None, module='kicad_laser_tracer'):
+    """Build the interpreter path, argv and environment for running module under KiCad's Python.
+
+    Raises KiCadPythonNotFoundError rather than exiting, so library callers
+    decide how to report it.
+    """
     kicad_python = get_kicad_python_path()
 
     if not kicad_python:
-        print("ERROR: Could not find KiCad's Python interpreter.", file=sys.stderr)
-        print("Please ensure KiCad is installed.", file=sys.stderr)
-        sys.exit(1)
+        raise KiCadPythonNotFoundError(
+            "Could not find KiCad's Python interpreter.\nPlease ensure KiCad is installed."
+        )
 
-    if not Path(kicad_python).exists():
-        print(f"ERROR: KiCad Python not found at: {kicad_python}", file=sys.stderr)
-        sys.exit(1)
+    if not os.path.exists(kicad_python):
+        raise KiCadPythonNotFoundError(f"KiCad Python not found at: {kicad_python}")
 
-    # Re-execute with KiCad's Python
     env = os.environ.copy()
 
     # Build PYTHONPATH with our package source directory only
     # We don't include the current env's site-packages because kigadgets
     # from a different Python version causes issues with pcbnew loading
-    package_dir = Path(__file__).parent.parent
-    paths_to_add = [str(package_dir)]
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-    existing_path = env.get('PYTHONPATH', '')
-    new_path = ':'.join(paths_to_add)
+    existing_path = env.get('PYTHONPATH')
     if existing_path:
-        env['PYTHONPATH'] = f"{new_path}:{existing_path}"
+        env['PYTHONPATH'] = f"{package_dir}{os.pathsep}{existing_path}"
     else:
-        env['PYTHONPATH'] = new_path
+        env['PYTHONPATH'] = package_dir
 
     # Mark that we've already tried re-exec to prevent infinite loops
     env['_KICAD_LASER_TRACER_REEXEC'] = '1'
+    # Hand the discovered interpreter down so the child never re-discovers it
+    env[KIPY_ENV_VAR] = kicad_python
 
     # Re-run with the same arguments
-    cmd = [kicad_python, '-m', 'kicad_laser_tracer'] + sys.argv[1:]
+    if argv is None:
+        argv = sys.argv[1:]
+    cmd = [kicad_python, '-m', module] + list(argv)
+
+    return kicad_python, cmd, env
+
+
+def reexec_with_kicad_python():
+    """Re-execute this script with KiCad's Python."""
+    try:
+        kicad_python, cmd, env = build_kicad_python_command()
+    except KiCadPythonNotFoundError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
     try:
         # Use os.execve to replace this process entirely, avoiding cleanup issues
@@ -100,19 +153,83 @@ def reexec_with_kicad_python():
         sys.exit(1)
 
 
-def run_main():
-    """The actual main logic that requires pcbnew."""
-    from .core import (
-        generate_isolation_svg,
-        generate_edge_cuts_svg,
-        generate_drill_holes_svg,
-        generate_solder_mask_svg,
-        generate_user_comments_svg,
-        generate_multi_color_svg,
-        generate_multi_color_svg_back
-    )
+def run_via_spawn(argv=None):
+    """Run the CLI under KiCad's Python as a child process and return its exit code.
+
+    Intended for callers embedding kicad-laser-tracer in another tool, where
+    replacing the calling process with os.execve is not an option. Never
+    exits: failures print an error and return 1.
+    """
+    try:
+        kicad_python, cmd, env = build_kicad_python_command(argv)
+    except KiCadPythonNotFoundError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    if not hasattr(os, 'posix_spawn'):
+        try:
+            # close_fds=False lets CPython take its posix_spawn/vfork fast path
+            return subprocess.run(cmd, env=env, close_fds=False).returncode
+        except OSError as e:
+            print(f"ERROR: Failed to run with KiCad Python: {e}", file=sys.stderr)
+            return 1
+
+    try:
+        # posix_spawn uses vfork semantics, so the parent's page tables
+        # are never copied the way a plain fork() would
+        pid = os.posix_spawn(kicad_python, cmd, env)
+        _, status = os.waitpid(pid, 0)
+    except Exception as e:
+        print(f"ERROR: Failed to run with KiCad Python: {e}", file=sys.stderr)
+        return 1
+
+    return os.waitstatus_to_exitcode(status)
+
+
+# Generator behind each kind of output. Names are resolved in core by the
+# process that runs the task, so this module never imports pcbnew itself.
+GENERATORS = {
+    "isolation": "generate_isolation_svg",
+    "drill": "generate_drill_holes_svg",
+    "mask": "generate_solder_mask_svg",
+    "comments": "generate_user_comments_svg",
+    "edge_cuts": "generate_edge_cuts_svg",
+    "multi_front": "generate_multi_color_svg",
+    "multi_back": "generate_multi_color_svg_back",
+}
+
+# Board context loaded once per process by _init_worker
+_worker_ctx = None
+
+
+def _init_worker(pcb_file):
+    """Load the board once per process, before it runs any tasks."""
+    global _worker_ctx
+    from .core import load_context
+    _worker_ctx = load_context(pcb_file)
+
+
+def _run_task(task):
+    """Run one (kind, args) task and return what its generator printed."""
+    import contextlib
+    import io
+
+    from . import core
+
+    kind, task_args = task
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        getattr(core, GENERATORS[kind])(*task_args, ctx=_worker_ctx)
+    return output.getvalue()
+
+
+def build_parser(prog=None):
+    """Build the argument parser, importing argparse only when it is needed."""
+    import argparse
+    from pathlib import Path
 
     parser = argparse.ArgumentParser(
+        prog=prog,
         description="Generate isolation routing SVGs using KiCad's native boolean operations"
     )
     parser.add_argument("pcb_file", type=Path, help="Input KiCad PCB file")
@@ -124,9 +241,18 @@ def run_main():
     parser.add_argument("--comments", action="store_true", help="Generate User.Comments layer SVG")
     parser.add_argument("--all", action="store_true", help="Generate all outputs (isolation, drill, mask, edge cuts, comments)")
     parser.add_argument("--multi", action="store_true", help="Generate single multi-color SVG for XCS import")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes (default: one per output, up to CPU count)")
+    return parser
 
-    args = parser.parse_args()
 
+def run_main(argv=None):
+    """The actual main logic that requires pcbnew."""
+    run(build_parser().parse_args(argv))
+
+
+def run(args):
+    """Generate the outputs selected by parsed command-line arguments."""
     print("=" * 60)
     print("PCB Isolation Router - Using KiCad Native Boolean Operations")
     print("=" * 60)
@@ -138,58 +264,76 @@ def run_main():
     if args.side in ["back", "both"]:
         copper_layers.append("B.Cu")
 
+    # Each task is (kind, args); they are independent of each other
+    tasks = []
+
     # If multi-color mode, generate single SVG per side
     if args.multi:
         if "F.Cu" in copper_layers:
-            generate_multi_color_svg(args.pcb_file, args.output, ["F.Cu"])
+            tasks.append(("multi_front", (args.pcb_file, args.output, ["F.Cu"])))
         if "B.Cu" in copper_layers:
-            generate_multi_color_svg_back(args.pcb_file, args.output, ["B.Cu"])
+            tasks.append(("multi_back", (args.pcb_file, args.output, ["B.Cu"])))
     else:
         # Generate individual SVGs for each copper layer
-        for layer in copper_layers:
-            generate_isolation_svg(args.pcb_file, layer, args.output)
-            print()
+        tasks.extend(("isolation", (args.pcb_file, layer, args.output)) for layer in copper_layers)
 
         # Generate drill holes if requested (only once, not per layer)
         if args.drill or args.all:
-            generate_drill_holes_svg(args.pcb_file, args.output)
-            print()
+            tasks.append(("drill", (args.pcb_file, args.output)))
 
         # Generate solder mask if requested
         if args.mask or args.all:
-            for layer in copper_layers:
-                generate_solder_mask_svg(args.pcb_file, layer, args.output)
-                print()
+            tasks.extend(("mask", (args.pcb_file, layer, args.output)) for layer in copper_layers)
 
         # Generate User.Comments if requested
         if args.comments or args.all:
-            generate_user_comments_svg(args.pcb_file, args.output)
-            print()
+            tasks.append(("comments", (args.pcb_file, args.output)))
 
         # Always generate edge cuts
-        generate_edge_cuts_svg(args.pcb_file, args.output)
+        tasks.append(("edge_cuts", (args.pcb_file, args.output)))
+
+    # Created up front so concurrent workers never race on it
+    args.output.mkdir(exist_ok=True)
+
+    jobs = min(len(tasks), args.jobs or os.cpu_count() or 1)
+    if jobs > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # "spawn" rather than fork: pcbnew holds C++ state that does not
+        # survive fork cleanly
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(args.pcb_file,)) as executor:
+            # map() yields results in submission order, so the log and the
+            # files written are the same whatever order the workers finish in
+            _write_outputs(executor.map(_run_task, tasks))
+    else:
+        # Parse the board once and share it between all generators
+        _init_worker(args.pcb_file)
+        _write_outputs(_run_task(task) for task in tasks)
+
+    sys.stdout.write(
+        "=" * 60 + "\n"
+        + "Done! Generated SVGs for laser cutting/etching.\n"
+        + "=" * 60 + "\n"
+    )
 
-    print("\n" + "=" * 60)
-    print("Done! Generated SVGs for laser cutting/etching.")
-    print("=" * 60)
+
+def _write_outputs(outputs):
+    """Write each task's captured log as soon as it is available.
+
+    One write per task rather than per line keeps a slow terminal or pipe
+    cheap, and a task that raises no longer swallows the logs of the
+    tasks that finished before it.
+    """
+    for output in outputs:
+        sys.stdout.write(output + "\n")
+        sys.stdout.flush()
 
 
 def show_help():
     """Show help without triggering kigadgets import."""
-    parser = argparse.ArgumentParser(
-        prog="kicad-laser-tracer",
-        description="Generate isolation routing SVGs using KiCad's native boolean operations"
-    )
-    parser.add_argument("pcb_file", type=Path, help="Input KiCad PCB file")
-    parser.add_argument("-o", "--output", type=Path, default=Path("output"), help="Output directory")
-    parser.add_argument("-s", "--side", choices=["front", "back", "both"], default="both",
-                        help="Which side(s) to generate (default: both)")
-    parser.add_argument("--drill", action="store_true", help="Generate drill holes SVG")
-    parser.add_argument("--mask", action="store_true", help="Generate solder mask SVG")
-    parser.add_argument("--comments", action="store_true", help="Generate User.Comments layer SVG")
-    parser.add_argument("--all", action="store_true", help="Generate all outputs (isolation, drill, mask, edge cuts, comments)")
-    parser.add_argument("--multi", action="store_true", help="Generate single multi-color SVG for XCS import")
-    parser.print_help()
+    build_parser(prog="kicad-laser-tracer").print_help()
 
 
 def main():
@@ -202,7 +346,17 @@ def main():
         os._exit(0)  # Use os._exit to avoid any cleanup that might trigger kigadgets
 
     # Check if we've already tried re-exec (prevent infinite loops)
-    if os.environ.get('_KICAD_LASER_TRACER_REEXEC'):
+    reexeced = os.environ.get('_KICAD_LASER_TRACER_REEXEC')
+
+    # Hand the job to a warm daemon that already has pcbnew loaded
+    if not reexeced and os.environ.get(DAEMON_ENV_VAR):
+        from .daemon import run_via_daemon
+        code = run_via_daemon(sys.argv[1:])
+        if code is not None:
+            sys.exit(code)
+        # No daemon could be reached; fall through to a normal run
+
+    if reexeced:
         # We're in the re-exec'd process, just run
         run_main()
         return
@@ -10,348 +10,668 @@ try:
 except ImportError:
     import kigadgets  # noqa: F401 - sets up path to pcbnew
     import pcbnew
-import xml.etree.ElementTree as ET
+import functools
+import itertools
+import math
+import os
 from pathlib import Path
 
 # SVG namespace
 SVG_NS = "http://www.w3.org/2000/svg"
-ET.register_namespace("", SVG_NS)
 
-def shape_poly_set_to_svg_path(poly_set):
-    """Convert a SHAPE_POLY_SET to SVG path data."""
-    path_data = []
-    
-    # Iterate through all outlines in the poly set
+# KiCad internal units (nanometres) per millimetre. Dividing by this gives
+# exactly what pcbnew.ToMM returns, minus the SWIG call overhead.
+IU_PER_MM = 1e6
+
+# Diameter (IU) to radius (mm) in one division. Halving is exact in binary,
+# so d / IU_PER_DIAMETER_MM is bit-identical to d / IU_PER_MM / 2.
+IU_PER_DIAMETER_MM = 2 * IU_PER_MM
+
+# Maximum chord error (nm) when KiCad turns arcs and round pads into
+# polygons. 25 um is well below what a laser resolves, and a coarser error
+# means fewer vertices for the Boolean subtraction and in the SVG; pass a
+# smaller arc_error_nm when tighter curves matter.
+ARC_ERROR_NM = 25000
+
+# Write buffer for SvgWriter. Elements are small and numerous, so a larger
+# buffer than io's 8 KiB default saves many write syscalls on dense boards.
+SVG_WRITE_BUFFER = 1 << 20
+
+class SvgWriter:
+    """Stream SVG elements straight to a file instead of building an ElementTree.
+
+    Attribute values are written as given: everything we emit is numbers,
+    colours and path data, none of which needs XML escaping.
+
+    Output goes to a sibling temporary file that replaces output_file only
+    when the with block exits cleanly, so a generator that raises part way
+    never leaves a truncated SVG (or clobbers a good one from an earlier run).
+    """
+
+    def __init__(self, output_file: Path):
+        self._output_file = output_file
+        self._temp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+        self._file = open(self._temp_file, "wb", buffering=SVG_WRITE_BUFFER)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._file.write(b"</svg>\n")
+            self._file.close()
+        except BaseException:
+            os.unlink(self._temp_file)
+            raise
+        if exc_type is None:
+            os.replace(self._temp_file, self._output_file)
+        else:
+            os.unlink(self._temp_file)
+
+    def start_svg(self, x_mm, y_mm, w_mm, h_mm):
+        """Write the XML declaration and the opening <svg> tag for the given viewBox."""
+        self._file.write(
+            b"<?xml version='1.0' encoding='utf-8'?>\n"
+            + (f'<svg xmlns="{SVG_NS}" version="1.1" width="{w_mm}mm" height="{h_mm}mm" '
+               f'viewBox="{x_mm} {y_mm} {w_mm} {h_mm}">\n').encode()
+        )
+
+    def element(self, tag, **attrs):
+        """Write one empty element.
+
+        Underscores in attribute names become hyphens (fill_rule -> fill-rule);
+        attributes whose value is None are left out.
+        """
+        self._file.write(b"<" + tag.encode() + b" " + _attrs_bytes(attrs) + b"/>\n")
+
+    def path(self, d, **attrs):
+        """Write a <path> element whose path data d is already ASCII bytes.
+
+        The path data is written on its own, so a multi-megabyte d is never
+        decoded, re-encoded or copied into a larger buffer.
+        """
+        write = self._file.write
+        write(b'<path d="')
+        write(d)
+        write(b'" ' + _attrs_bytes(attrs) + b"/>\n")
+
+@functools.lru_cache(maxsize=None)
+def _attr_name(name):
+    """SVG attribute name for a keyword argument name (fill_rule -> fill-rule)."""
+    return name.replace("_", "-")
+
+def _attrs_bytes(attrs):
+    """Serialize keyword attributes for SvgWriter, skipping None values."""
+    return " ".join(
+        f'{_attr_name(name)}="{value}"' for name, value in attrs.items() if value is not None
+    ).encode()
+
+def load_board(pcb_file: Path):
+    """Load a KiCad board so it can be shared between several generators."""
+    return pcbnew.LoadBoard(str(pcb_file))
+
+# Layers every run looks up. Their IDs are fixed pcbnew constants, so the
+# layer_id cache starts out holding them and never asks the board.
+_STANDARD_LAYER_IDS = {
+    "F.Cu": pcbnew.F_Cu,
+    "B.Cu": pcbnew.B_Cu,
+    "F.Mask": pcbnew.F_Mask,
+    "B.Mask": pcbnew.B_Mask,
+    "User.Comments": pcbnew.Cmts_User,
+}
+
+class PcbContext:
+    """A loaded board plus the per-board values every generator needs.
+
+    Build one per board and hand it to each generator so the file is parsed,
+    and the outline and bounding box computed, only once per run.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.bbox = board.ComputeBoundingBox(False)
+        self.board_x_mm = self.bbox.GetX() / IU_PER_MM
+        self.board_y_mm = self.bbox.GetY() / IU_PER_MM
+        self.board_w_mm = self.bbox.GetWidth() / IU_PER_MM
+        self.board_h_mm = self.bbox.GetHeight() / IU_PER_MM
+        self.board_center_x = self.board_x_mm + self.board_w_mm / 2
+        self._layer_ids = dict(_STANDARD_LAYER_IDS)
+        self._pads_on = {}
+        self._tracks_on = {}
+        self._outline_paths = {}
+
+    @functools.cached_property
+    def board_outline(self):
+        """Closed board outline; shared, so callers must copy before modifying it."""
+        board_outline = pcbnew.SHAPE_POLY_SET()
+        self.board.GetBoardPolygonOutlines(board_outline, True)
+        return board_outline
+
+    @functools.cached_property
+    def outline_bbox(self):
+        """Bounding box of the board outline alone.
+
+        Unlike bbox (every item on the board), copper outside this box cannot
+        change the isolation, so it is what copper collection clips against.
+        """
+        return self.board_outline.BBox()
+
+    @functools.cached_property
+    def tracks(self):
+        """Tracks and vias, listed once instead of re-walking the board each pass."""
+        return list(self.board.GetTracks())
+
+    @functools.cached_property
+    def vias(self):
+        """The vias among tracks, so via passes skip the GetClass() check per track."""
+        return [track for track in self.tracks if track.GetClass() == "PCB_VIA"]
+
+    @functools.cached_property
+    def pads(self):
+        """Pads of every footprint as one flat list."""
+        return list(itertools.chain.from_iterable(fp.Pads() for fp in self.board.GetFootprints()))
+
+    @functools.cached_property
+    def zones(self):
+        """Zones, listed once."""
+        return list(self.board.Zones())
+
+    @functools.cached_property
+    def drawings(self):
+        """Board-level drawings (not footprint graphics), listed once."""
+        return list(self.board.GetDrawings())
+
+    @functools.cached_property
+    def drill_holes(self):
+        """(pad_holes, slots, via_holes) from _drill_holes, scanned once per board."""
+        return _drill_holes(self)
+
+    def outline_path(self, mirror_center_x=None):
+        """Board outline as SVG path data, formatted once per mirror setting."""
+        path_data = self._outline_paths.get(mirror_center_x)
+        if path_data is None:
+            path_data = self._outline_paths[mirror_center_x] = shape_poly_set_to_svg_path(
+                self.board_outline, mirror_center_x=mirror_center_x
+            )
+        return path_data
+
+    def pads_on(self, layer_id):
+        """Pads on the given layer, filtered with IsOnLayer only once per layer."""
+        pads = self._pads_on.get(layer_id)
+        if pads is None:
+            pads = self._pads_on[layer_id] = [pad for pad in self.pads if pad.IsOnLayer(layer_id)]
+        return pads
+
+    def tracks_on(self, layer_id):
+        """Tracks and vias on the given layer, filtered only once per layer."""
+        tracks = self._tracks_on.get(layer_id)
+        if tracks is None:
+            tracks = self._tracks_on[layer_id] = [track for track in self.tracks if track.IsOnLayer(layer_id)]
+        return tracks
+
+    def layer_id(self, name):
+        """Look up a layer ID by name, caching the answer."""
+        try:
+            return self._layer_ids[name]
+        except KeyError:
+            layer_id = self._layer_ids[name] = self.board.GetLayerID(name)
+            return layer_id
+
+# Most recently loaded context, keyed by (path, mtime, size). A long-lived
+# process such as the daemon reuses it while the file is unchanged; only one
+# board is kept so serving many boards does not grow memory.
+_context_cache = {}
+
+def load_context(pcb_file: Path):
+    """Load a board and wrap it in a PcbContext, reusing it if the file is unchanged.
+
+    The returned board and its cached lists are shared between callers and
+    must not be modified.
+    """
+    path = Path(pcb_file).resolve()
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    ctx = _context_cache.get(key)
+    if ctx is None:
+        _context_cache.clear()
+        ctx = _context_cache[key] = PcbContext(load_board(path))
+    return ctx
+
+# Newer bindings return a chain's whole vertex vector from one CPoints() call,
+# instead of crossing SWIG once per CPoint(i)
+_HAS_CPOINTS = hasattr(pcbnew.SHAPE_LINE_CHAIN, "CPoints")
+
+def _poly_set_vertices(poly_set):
+    """Flatten every outline and hole of a SHAPE_POLY_SET in one pass.
+
+    Returns (coords, counts): coords is the flat [x0, y0, x1, y1, ...] list of
+    vertices in nanometres and counts the number of vertices per subpath.
+    """
+    coords = []
+    counts = []
     for outline_idx in range(poly_set.OutlineCount()):
-        outline = poly_set.Outline(outline_idx)
-        
-        # Start path for this outline
-        if outline.PointCount() > 0:
-            first_point = outline.CPoint(0)
-            x_mm = pcbnew.ToMM(first_point.x)
-            y_mm = pcbnew.ToMM(first_point.y)
-            path_data.append(f"M {x_mm:.6f} {y_mm:.6f}")
-            
-            # Add all other points
-            for i in range(1, outline.PointCount()):
-                point = outline.CPoint(i)
-                x_mm = pcbnew.ToMM(point.x)
-                y_mm = pcbnew.ToMM(point.y)
-                path_data.append(f"L {x_mm:.6f} {y_mm:.6f}")
-            
-            # Close the path
-            path_data.append("Z")
-        
-        # Handle holes in this outline
-        for hole_idx in range(poly_set.HoleCount(outline_idx)):
-            hole = poly_set.Hole(outline_idx, hole_idx)
+        chains = [poly_set.Outline(outline_idx)]
+        chains += [poly_set.Hole(outline_idx, hole_idx) for hole_idx in range(poly_set.HoleCount(outline_idx))]
+        for chain in chains:
+            point_count = chain.PointCount()
+            if point_count > 0:
+                if _HAS_CPOINTS:
+                    points = chain.CPoints()
+                else:
+                    points = (chain.CPoint(i) for i in range(point_count))
+                for point in points:
+                    coords.append(point.x)
+                    coords.append(point.y)
+                counts.append(point_count)
+    return coords, counts
+
+@functools.lru_cache(maxsize=256)
+def _subpath_template(point_count):
+    """Format string for one closed subpath with point_count vertices."""
+    return b"M %.6f %.6f " + b"L %.6f %.6f " * (point_count - 1) + b"Z"
+
+def _format_path_data(coords, counts, mirror=None):
+    """Format flattened nanometre vertices as SVG path data in a single % operation.
+
+    The result is ASCII bytes, ready for SvgWriter.path without re-encoding.
+    When mirror is given, x coordinates are reflected as mirror - x (in mm).
+    """
+    # Same division pcbnew.ToMM does, without a SWIG call per point. map()
+    # over bound float methods keeps the per-vertex work in C.
+    values = list(map(IU_PER_MM.__rtruediv__, coords))
+    if mirror is not None:
+        values[0::2] = map(mirror.__sub__, values[0::2])
+    template = b" ".join([_subpath_template(n) for n in counts])
+    return template % tuple(values)
+
+def shape_poly_set_to_svg_path(poly_set, mirror_center_x=None):
+    """Convert a SHAPE_POLY_SET to SVG path data (ASCII bytes).
+
+    With mirror_center_x (mm), X coordinates are mirrored across that
+    vertical line, as needed for back-side output.
+    """
+    mirror = None if mirror_center_x is None else 2.0 * float(mirror_center_x)
+    return _format_path_data(*_poly_set_vertices(poly_set), mirror=mirror)
+
+# One closed circle drawn as two half arcs, so many holes fit in one <path>
+_CIRCLE_SUBPATH = b"M %.6f %.6f a %.6f %.6f 0 1 0 %.6f 0 a %.6f %.6f 0 1 0 %.6f 0 Z"
+
+def _circles_path_data(circles, mirror=None):
+    """Format (cx, cy, r) circles as SVG path data in a single % operation.
+
+    Exact duplicates (stacked vias, pads drilled twice by overlapping
+    footprints) are emitted once; order is otherwise preserved. When mirror
+    is given, centres are reflected as mirror - cx (in mm).
+    """
+    circles = list(dict.fromkeys(circles))
+    values = []
+    if mirror is None:
+        for cx, cy, r in circles:
+            values += (cx - r, cy, r, r, 2 * r, r, r, -2 * r)
+    else:
+        for cx, cy, r in circles:
+            values += (mirror - cx - r, cy, r, r, 2 * r, r, r, -2 * r)
+    return b" ".join([_CIRCLE_SUBPATH] * len(circles)) % tuple(values)
+
+# One closed ellipse, rotated by angle degrees, drawn as two half arcs
+_SLOT_SUBPATH = b"M %.6f %.6f a %.6f %.6f %g 1 0 %.6f %.6f a %.6f %.6f %g 1 0 %.6f %.6f Z"
+
+def _slots_path_data(slots):
+    """Format (cx, cy, w, h, angle) oval slots as SVG path data in a single % operation."""
+    values = []
+    for cx, cy, w, h, angle in slots:
+        rx, ry = w / 2, h / 2
+        theta = math.radians(angle)
+        dx, dy = rx * math.cos(theta), rx * math.sin(theta)
+        values += (cx - dx, cy - dy, rx, ry, angle, 2 * dx, 2 * dy, rx, ry, angle, -2 * dx, -2 * dy)
+    return b" ".join([_SLOT_SUBPATH] * len(slots)) % tuple(values)
+
+def _boolean_subtract(board_area, copper_shapes):
+    """Return board_area - copper_shapes without modifying either input.
+
+    The two-operand BooleanSubtract writes into a fresh set, so a shared
+    outline can be passed directly without copying it first.
+    """
+    if copper_shapes.OutlineCount() == 0:
+        # Nothing to subtract; skip the Boolean engine entirely
+        return pcbnew.SHAPE_POLY_SET(board_area)
+    result = pcbnew.SHAPE_POLY_SET()
+    result.BooleanSubtract(board_area, copper_shapes)
+    return result
+
+def _collect_copper_shapes(ctx, layer_id, clip_bbox, arc_error_nm=ARC_ERROR_NM):
+    """Polygonize the tracks, pads and zones of one copper layer into one merged set.
+
+    Items whose bounding box misses clip_bbox are skipped before the
+    expensive polygonization. Returns (copper_shapes, track_count,
+    pad_count, zone_count).
+    """
+    copper_shapes = pcbnew.SHAPE_POLY_SET()
+    
+    # Add tracks
+    track_count = 0
+    for track in ctx.tracks_on(layer_id):
+        if track.GetBoundingBox().Intersects(clip_bbox):
+            track.TransformShapeToPolygon(copper_shapes, layer_id, 0, arc_error_nm, pcbnew.ERROR_INSIDE)
+            track_count += 1
+    
+    # Add pads
+    pad_count = 0
+    for pad in ctx.pads_on(layer_id):
+        if pad.GetBoundingBox().Intersects(clip_bbox):
+            pad.TransformShapeToPolygon(copper_shapes, layer_id, 0, arc_error_nm, pcbnew.ERROR_INSIDE)
+            pad_count += 1
+    
+    # Add zones
+    zone_count = 0
+    for zone in ctx.zones:
+        if zone.IsOnLayer(layer_id) and zone.GetBoundingBox().Intersects(clip_bbox):
+            filled_polys = zone.GetFilledPolysList(layer_id)
+            if filled_polys:
+                copper_shapes.Append(filled_polys)
+            zone_count += 1
+    
+    # Merge overlapping fragments (track ends under pads, pads inside pours)
+    # so the subtraction that follows sees far fewer edges
+    copper_shapes.Simplify()
+    
+    return copper_shapes, track_count, pad_count, zone_count
+
+def _drill_holes(ctx):
+    """Collect every drill hole in one pass over the pads and one over the vias.
+
+    Returns (pad_holes, slots, via_holes): round pad holes and via holes as
+    (x, y, r) tuples and oval pad slots as (x, y, w, h, angle), all in mm.
+    """
+    pad_holes = []
+    slots = []
+    via_holes = []
+    
+    for pad in ctx.pads:
+        drill_size = pad.GetDrillSize()
+        if drill_size.x > 0 and drill_size.y > 0:
+            pos = pad.GetPosition()
+            x_mm = pos.x / IU_PER_MM
+            y_mm = pos.y / IU_PER_MM
             
-            if hole.PointCount() > 0:
-                first_point = hole.CPoint(0)
-                x_mm = pcbnew.ToMM(first_point.x)
-                y_mm = pcbnew.ToMM(first_point.y)
-                path_data.append(f"M {x_mm:.6f} {y_mm:.6f}")
-                
-                for i in range(1, hole.PointCount()):
-                    point = hole.CPoint(i)
-                    x_mm = pcbnew.ToMM(point.x)
-                    y_mm = pcbnew.ToMM(point.y)
-                    path_data.append(f"L {x_mm:.6f} {y_mm:.6f}")
-                
-                path_data.append("Z")
+            if drill_size.x == drill_size.y:
+                # Circular hole
+                pad_holes.append((x_mm, y_mm, drill_size.x / IU_PER_DIAMETER_MM))
+            else:
+                # Oval hole (slot)
+                angle = pad.GetOrientationDegrees()
+                slots.append((x_mm, y_mm, drill_size.x / IU_PER_MM, drill_size.y / IU_PER_MM, angle))
+    
+    for via in ctx.vias:
+        drill_value = via.GetDrillValue()
+        if drill_value > 0:
+            pos = via.GetPosition()
+            via_holes.append((pos.x / IU_PER_MM, pos.y / IU_PER_MM, drill_value / IU_PER_DIAMETER_MM))
     
-    return " ".join(path_data)
+    return pad_holes, slots, via_holes
+
+def _mask_openings(ctx, mask_layer_id, arc_error_nm=ARC_ERROR_NM, include_zones=True):
+    """Build the solder mask openings of one mask layer from pads, zones and vias.
 
-def shape_poly_set_to_svg_path_mirrored(poly_set, board_center_x):
-    """Convert a SHAPE_POLY_SET to SVG path data, mirrored across Y axis."""
-    path_data = []
+    Openings have no mask margin, so a round pad or via opens exactly a
+    circle; those are returned as (x, y, r) tuples in mm for
+    _circles_path_data instead of being polygonized. The multi-color output
+    has never drawn zone openings, so it passes include_zones=False.
+    Returns (mask_openings, mask_circles, pad_count, via_count, zone_count).
+    """
+    mask_openings = pcbnew.SHAPE_POLY_SET()
+    mask_circles = []
     
-    # Iterate through all outlines in the poly set
-    for outline_idx in range(poly_set.OutlineCount()):
-        outline = poly_set.Outline(outline_idx)
-        
-        # Start path for this outline
-        if outline.PointCount() > 0:
-            first_point = outline.CPoint(0)
-            x_mm = pcbnew.ToMM(first_point.x)
-            y_mm = pcbnew.ToMM(first_point.y)
-            # Mirror X coordinate across board center
-            x_mirrored = 2 * board_center_x - x_mm
-            path_data.append(f"M {x_mirrored:.6f} {y_mm:.6f}")
-            
-            # Add all other points
-            for i in range(1, outline.PointCount()):
-                point = outline.CPoint(i)
-                x_mm = pcbnew.ToMM(point.x)
-                y_mm = pcbnew.ToMM(point.y)
-                x_mirrored = 2 * board_center_x - x_mm
-                path_data.append(f"L {x_mirrored:.6f} {y_mm:.6f}")
-            
-            # Close the path
-            path_data.append("Z")
-        
-        # Handle holes in this outline
-        for hole_idx in range(poly_set.HoleCount(outline_idx)):
-            hole = poly_set.Hole(outline_idx, hole_idx)
-            
-            if hole.PointCount() > 0:
-                first_point = hole.CPoint(0)
-                x_mm = pcbnew.ToMM(first_point.x)
-                y_mm = pcbnew.ToMM(first_point.y)
-                x_mirrored = 2 * board_center_x - x_mm
-                path_data.append(f"M {x_mirrored:.6f} {y_mm:.6f}")
-                
-                for i in range(1, hole.PointCount()):
-                    point = hole.CPoint(i)
-                    x_mm = pcbnew.ToMM(point.x)
-                    y_mm = pcbnew.ToMM(point.y)
-                    x_mirrored = 2 * board_center_x - x_mm
-                    path_data.append(f"L {x_mirrored:.6f} {y_mm:.6f}")
+    # Padstack accessors take a copper layer on KiCad 9; use this side's
+    copper_layer_id = pcbnew.F_Cu if mask_layer_id == pcbnew.F_Mask else pcbnew.B_Cu
+    
+    # Add pad openings
+    pad_count = 0
+    for pad in ctx.pads_on(mask_layer_id):
+        offset = pad.GetOffset(copper_layer_id)
+        if pad.GetShape(copper_layer_id) == pcbnew.PAD_SHAPE_CIRCLE and offset.x == 0 and offset.y == 0:
+            pos = pad.GetPosition()
+            mask_circles.append((pos.x / IU_PER_MM, pos.y / IU_PER_MM, pad.GetSize(copper_layer_id).x / IU_PER_DIAMETER_MM))
+        else:
+            pad.TransformShapeToPolygon(mask_openings, mask_layer_id, 0, arc_error_nm, pcbnew.ERROR_INSIDE)
+        pad_count += 1
+    
+    # Add any explicit mask openings from zones
+    zone_count = 0
+    for zone in ctx.zones if include_zones else ():
+        if zone.IsOnLayer(mask_layer_id):
+            filled_polys = zone.GetFilledPolysList(mask_layer_id)
+            if filled_polys:
+                mask_openings.Append(filled_polys)
+            zone_count += 1
+    
+    # Add via openings - vias need solder mask removal on both sides
+    for via in ctx.vias:
+        pos = via.GetPosition()
+        mask_circles.append((pos.x / IU_PER_MM, pos.y / IU_PER_MM, via.GetWidth(copper_layer_id) / IU_PER_DIAMETER_MM))
+    via_count = len(ctx.vias)
+    
+    return mask_openings, mask_circles, pad_count, via_count, zone_count
+
+@functools.lru_cache(maxsize=None)
+def _stroke_width(width_nm):
+    """Format a drawing's line width (nm) as a stroke-width string, once per width."""
+    return "%.3f" % (width_nm / IU_PER_MM)
+
+def _write_user_comments(svg, ctx, mirror_center_x=None):
+    """Write the User.Comments drawings as stroked shapes and return how many.
+
+    With mirror_center_x (mm), X coordinates are mirrored across that line.
+    """
+    if mirror_center_x is None:
+        def mx(x):
+            return x
+    else:
+        mirror = 2 * mirror_center_x
+        def mx(x):
+            return mirror - x
+    
+    comments_layer_id = ctx.layer_id("User.Comments")
+    drawing_count = 0
+    for drawing in ctx.drawings:
+        if drawing.IsOnLayer(comments_layer_id):
+            if drawing.GetClass() == "PCB_SHAPE":
+                shape = drawing
+                shape_type = shape.GetShape()
+                stroke_width = _stroke_width(shape.GetWidth())
                 
-                path_data.append("Z")
+                # Handle different shape types
+                if shape_type == pcbnew.SHAPE_T_SEGMENT:
+                    # Line segment
+                    start = shape.GetStart()
+                    end = shape.GetEnd()
+                    svg.element(
+                        "line",
+                        x1="%.6f" % mx(start.x / IU_PER_MM),
+                        y1="%.6f" % (start.y / IU_PER_MM),
+                        x2="%.6f" % mx(end.x / IU_PER_MM),
+                        y2="%.6f" % (end.y / IU_PER_MM),
+                        stroke="#00befe",  # Cyan/light blue like contour
+                        stroke_width=stroke_width,
+                        fill="none",
+                    )
+                    drawing_count += 1
+                    
+                elif shape_type == pcbnew.SHAPE_T_RECT:
+                    # Rectangle
+                    start = shape.GetStart()
+                    end = shape.GetEnd()
+                    start_x = mx(start.x / IU_PER_MM)
+                    end_x = mx(end.x / IU_PER_MM)
+                    x = min(start_x, end_x)
+                    y = min(start.y / IU_PER_MM, end.y / IU_PER_MM)
+                    width = abs(end_x - start_x)
+                    height = abs(end.y / IU_PER_MM - start.y / IU_PER_MM)
+                    svg.element(
+                        "rect",
+                        x="%.6f" % x,
+                        y="%.6f" % y,
+                        width="%.6f" % width,
+                        height="%.6f" % height,
+                        stroke="#00befe",
+                        stroke_width=stroke_width,
+                        fill="none",
+                    )
+                    drawing_count += 1
+                    
+                elif shape_type == pcbnew.SHAPE_T_CIRCLE:
+                    # Circle
+                    center = shape.GetCenter()
+                    radius = shape.GetRadius()
+                    svg.element(
+                        "circle",
+                        cx="%.6f" % mx(center.x / IU_PER_MM),
+                        cy="%.6f" % (center.y / IU_PER_MM),
+                        r="%.6f" % (radius / IU_PER_MM),
+                        stroke="#00befe",
+                        stroke_width=stroke_width,
+                        fill="none",
+                    )
+                    drawing_count += 1
+                    
+                elif shape_type == pcbnew.SHAPE_T_POLY:
+                    # Polygon/polyline
+                    poly_shape = shape.GetPolyShape()
+                    if poly_shape and poly_shape.OutlineCount() > 0:
+                        svg.path(
+                            shape_poly_set_to_svg_path(poly_shape, mirror_center_x=mirror_center_x),
+                            stroke="#00befe",
+                            stroke_width=stroke_width,
+                            fill="none",
+                        )
+                        drawing_count += 1
     
-    return " ".join(path_data)
+    return drawing_count
 
-def generate_isolation_svg(pcb_file: Path, layer_name: str, output_dir: Path):
+def generate_isolation_svg(pcb_file: Path, layer_name: str, output_dir: Path, arc_error_nm=ARC_ERROR_NM, ctx=None):
     """Generate isolation routing SVG using KiCad's native boolean operations."""
     
     output_dir.mkdir(exist_ok=True)
     
-    # Load board
-    board = pcbnew.LoadBoard(str(pcb_file))
-    
-    # Get board bounding box for SVG dimensions
-    bbox = board.ComputeBoundingBox(False)
-    board_x_mm = pcbnew.ToMM(bbox.GetX())
-    board_y_mm = pcbnew.ToMM(bbox.GetY())
-    board_w_mm = pcbnew.ToMM(bbox.GetWidth())
-    board_h_mm = pcbnew.ToMM(bbox.GetHeight())
+    # Load board unless the caller already has it open
+    if ctx is None:
+        ctx = load_context(pcb_file)
+    board_x_mm, board_y_mm = ctx.board_x_mm, ctx.board_y_mm
+    board_w_mm, board_h_mm = ctx.board_w_mm, ctx.board_h_mm
     
     print(f"Processing {layer_name}...")
     print(f"  Board: ({board_x_mm:.2f}, {board_y_mm:.2f}) {board_w_mm:.2f}x{board_h_mm:.2f}mm")
     
     # Get board outline
-    board_outline = pcbnew.SHAPE_POLY_SET()
-    board.GetBoardPolygonOutlines(board_outline, True)
+    board_outline = ctx.board_outline
     print(f"  Board outline: {board_outline.OutlineCount()} outlines, {board_outline.TotalVertices()} vertices")
     
-    # Use exact board outline without deflation
-    # This allows traces to go right up to the board edge
-    board_area = pcbnew.SHAPE_POLY_SET(board_outline)
-    
-    # Collect all copper shapes on this layer
-    copper_shapes = pcbnew.SHAPE_POLY_SET()
-    layer_id = board.GetLayerID(layer_name)
-    
-    # Add tracks
-    track_count = 0
-    for track in board.GetTracks():
-        if track.IsOnLayer(layer_id):
-            track.TransformShapeToPolygon(copper_shapes, layer_id, 0, 10000, pcbnew.ERROR_INSIDE)
-            track_count += 1
-    
-    # Add pads
-    pad_count = 0
-    for footprint in board.GetFootprints():
-        for pad in footprint.Pads():
-            if pad.IsOnLayer(layer_id):
-                pad.TransformShapeToPolygon(copper_shapes, layer_id, 0, 10000, pcbnew.ERROR_INSIDE)
-                pad_count += 1
-    
-    # Add zones
-    zone_count = 0
-    for zone in board.Zones():
-        if zone.IsOnLayer(layer_id):
-            filled_polys = zone.GetFilledPolysList(layer_id)
-            if filled_polys:
-                copper_shapes.Append(filled_polys)
-            zone_count += 1
+    # Collect all copper shapes on this layer that can touch the board
+    layer_id = ctx.layer_id(layer_name)
+    copper_shapes, track_count, pad_count, zone_count = _collect_copper_shapes(ctx, layer_id, ctx.outline_bbox, arc_error_nm)
     
     print(f"  Copper: {track_count} tracks, {pad_count} pads, {zone_count} zones")
     print(f"  Total copper shapes: {copper_shapes.OutlineCount()} outlines")
     
-    # Perform boolean subtraction: board_area - copper = isolation
-    # This removes both copper and the board edge
-    isolation = pcbnew.SHAPE_POLY_SET(board_area)
-    isolation.BooleanSubtract(copper_shapes)
+    # Perform boolean subtraction: board outline - copper = isolation
+    # The exact outline is used without deflation, so traces can go right
+    # up to the board edge; this removes both copper and the board edge
+    isolation = _boolean_subtract(board_outline, copper_shapes)
     
     print(f"  Isolation: {isolation.OutlineCount()} outlines, {isolation.TotalVertices()} vertices")
     
     # Convert to SVG
-    svg = ET.Element("svg")
-    svg.set("xmlns", SVG_NS)
-    svg.set("version", "1.1")
-    svg.set("width", f"{board_w_mm}mm")
-    svg.set("height", f"{board_h_mm}mm")
-    svg.set("viewBox", f"{board_x_mm} {board_y_mm} {board_w_mm} {board_h_mm}")
-    
-    # Create path element for isolation
-    # Use black for traces layer (areas to remove/etch)
-    path = ET.Element("path")
-    path.set("d", shape_poly_set_to_svg_path(isolation))
-    path.set("fill", "#000000")  # Black for traces
-    path.set("fill-rule", "evenodd")  # Important for holes
-    svg.append(path)
-    
-    # Write SVG file
     output_file = output_dir / f"isolation_{layer_name.replace('.', '_')}.svg"
-    tree = ET.ElementTree(svg)
-    tree.write(str(output_file), encoding="utf-8", xml_declaration=True)
+    with SvgWriter(output_file) as svg:
+        svg.start_svg(board_x_mm, board_y_mm, board_w_mm, board_h_mm)
+        
+        # Create path element for isolation
+        # Use black for traces layer (areas to remove/etch)
+        svg.path(
+            shape_poly_set_to_svg_path(isolation),
+            fill="#000000",  # Black for traces
+            fill_rule="evenodd",  # Important for holes
+        )
     
     print(f"  Generated: {output_file}")
     
     return output_file
 
-def generate_edge_cuts_svg(pcb_file: Path, output_dir: Path):
+def generate_edge_cuts_svg(pcb_file: Path, output_dir: Path, ctx=None):
     """Generate Edge.Cuts SVG."""
     
-    board = pcbnew.LoadBoard(str(pcb_file))
-    
-    # Get board bounding box
-    bbox = board.ComputeBoundingBox(False)
-    board_x_mm = pcbnew.ToMM(bbox.GetX())
-    board_y_mm = pcbnew.ToMM(bbox.GetY())
-    board_w_mm = pcbnew.ToMM(bbox.GetWidth())
-    board_h_mm = pcbnew.ToMM(bbox.GetHeight())
+    output_dir.mkdir(exist_ok=True)
     
-    # Get board outline
-    board_outline = pcbnew.SHAPE_POLY_SET()
-    board.GetBoardPolygonOutlines(board_outline, True)
+    # Load board unless the caller already has it open
+    if ctx is None:
+        ctx = load_context(pcb_file)
+    board_x_mm, board_y_mm = ctx.board_x_mm, ctx.board_y_mm
+    board_w_mm, board_h_mm = ctx.board_w_mm, ctx.board_h_mm
     
     # Convert to SVG
-    svg = ET.Element("svg")
-    svg.set("xmlns", SVG_NS)
-    svg.set("version", "1.1")
-    svg.set("width", f"{board_w_mm}mm")
-    svg.set("height", f"{board_h_mm}mm")
-    svg.set("viewBox", f"{board_x_mm} {board_y_mm} {board_w_mm} {board_h_mm}")
-    
-    # Create path for edge cuts (just the outline, not filled)
-    # Use green for contour layer
-    path = ET.Element("path")
-    path.set("d", shape_poly_set_to_svg_path(board_outline))
-    path.set("fill", "none")
-    path.set("stroke", "#00ff00")  # Green for contour
-    path.set("stroke-width", "0.1")
-    svg.append(path)
-    
-    # Write SVG
     output_file = output_dir / "edge_cuts.svg"
-    tree = ET.ElementTree(svg)
-    tree.write(str(output_file), encoding="utf-8", xml_declaration=True)
+    with SvgWriter(output_file) as svg:
+        svg.start_svg(board_x_mm, board_y_mm, board_w_mm, board_h_mm)
+        
+        # Create path for edge cuts (just the outline, not filled)
+        # Use green for contour layer
+        svg.path(
+            ctx.outline_path(),
+            fill="none",
+            stroke="#00ff00",  # Green for contour
+            stroke_width="0.1",
+        )
     
     print(f"Edge cuts: {output_file}")
     
     return output_file
 
-def generate_drill_holes_svg(pcb_file: Path, output_dir: Path):
+def generate_drill_holes_svg(pcb_file: Path, output_dir: Path, ctx=None):
     """Generate drill holes SVG."""
     
     output_dir.mkdir(exist_ok=True)
     
-    # Load board
-    board = pcbnew.LoadBoard(str(pcb_file))
-    
-    # Get board bounding box for SVG dimensions
-    bbox = board.ComputeBoundingBox(False)
-    board_x_mm = pcbnew.ToMM(bbox.GetX())
-    board_y_mm = pcbnew.ToMM(bbox.GetY())
-    board_w_mm = pcbnew.ToMM(bbox.GetWidth())
-    board_h_mm = pcbnew.ToMM(bbox.GetHeight())
+    # Load board unless the caller already has it open
+    if ctx is None:
+        ctx = load_context(pcb_file)
+    board_x_mm, board_y_mm = ctx.board_x_mm, ctx.board_y_mm
+    board_w_mm, board_h_mm = ctx.board_w_mm, ctx.board_h_mm
     
     print("Processing drill holes...")
     
-    # Convert to SVG
-    svg = ET.Element("svg")
-    svg.set("xmlns", SVG_NS)
-    svg.set("version", "1.1")
-    svg.set("width", f"{board_w_mm}mm")
-    svg.set("height", f"{board_h_mm}mm")
-    svg.set("viewBox", f"{board_x_mm} {board_y_mm} {board_w_mm} {board_h_mm}")
-    
-    hole_count = 0
-    
-    # Get drill holes from pads
-    for footprint in board.GetFootprints():
-        for pad in footprint.Pads():
-            drill_size = pad.GetDrillSize()
-            if drill_size.x > 0 and drill_size.y > 0:
-                pos = pad.GetPosition()
-                x_mm = pcbnew.ToMM(pos.x)
-                y_mm = pcbnew.ToMM(pos.y)
-                
-                if drill_size.x == drill_size.y:
-                    # Circular hole
-                    radius_mm = pcbnew.ToMM(drill_size.x) / 2
-                    circle = ET.Element("circle")
-                    circle.set("cx", f"{x_mm:.6f}")
-                    circle.set("cy", f"{y_mm:.6f}")
-                    circle.set("r", f"{radius_mm:.6f}")
-                    circle.set("fill", "#ff7f56")  # Orange (Clean layer) for holes
-                    svg.append(circle)
-                else:
-                    # Oval hole (slot)
-                    width_mm = pcbnew.ToMM(drill_size.x)
-                    height_mm = pcbnew.ToMM(drill_size.y)
-                    angle = pad.GetOrientation() / 10.0  # Convert from tenths of degree
-                    
-                    rect = ET.Element("ellipse")
-                    rect.set("cx", f"{x_mm:.6f}")
-                    rect.set("cy", f"{y_mm:.6f}")
-                    rect.set("rx", f"{width_mm/2:.6f}")
-                    rect.set("ry", f"{height_mm/2:.6f}")
-                    if angle != 0:
-                        rect.set("transform", f"rotate({angle} {x_mm} {y_mm})")
-                    rect.set("fill", "#ff7f56")  # Orange (Clean layer) for holes
-                    svg.append(rect)
-                
-                hole_count += 1
-    
-    # Get vias
-    for track in board.GetTracks():
-        if track.GetClass() == "PCB_VIA":
-            via = track
-            drill_value = via.GetDrillValue()
-            if drill_value > 0:
-                pos = via.GetPosition()
-                x_mm = pcbnew.ToMM(pos.x)
-                y_mm = pcbnew.ToMM(pos.y)
-                radius_mm = pcbnew.ToMM(drill_value) / 2
-                
-                circle = ET.Element("circle")
-                circle.set("cx", f"{x_mm:.6f}")
-                circle.set("cy", f"{y_mm:.6f}")
-                circle.set("r", f"{radius_mm:.6f}")
-                circle.set("fill", "#000000")
-                svg.append(circle)
-                
-                hole_count += 1
-    
-    print(f"  Found {hole_count} drill holes")
+    pad_holes, slots, via_holes = ctx.drill_holes
     
-    # Write SVG
+    # Convert to SVG
     output_file = output_dir / "drill_holes.svg"
-    tree = ET.ElementTree(svg)
-    tree.write(str(output_file), encoding="utf-8", xml_declaration=True)
+    with SvgWriter(output_file) as svg:
+        svg.start_svg(board_x_mm, board_y_mm, board_w_mm, board_h_mm)
+        
+        # Holes become subpaths of one <path> per colour, slots included
+        if pad_holes or slots:
+            hole_data = [_circles_path_data(pad_holes)] if pad_holes else []
+            if slots:
+                hole_data.append(_slots_path_data(slots))
+            svg.path(b" ".join(hole_data), fill="#ff7f56")  # Orange (Clean layer) for holes
+        if via_holes:
+            svg.path(_circles_path_data(via_holes), fill="#000000")
+        
+        print(f"  Found {len(pad_holes) + len(slots) + len(via_holes)} drill holes")
     
     print(f"  Generated: {output_file}")
     
     return output_file
 
-def generate_solder_mask_svg(pcb_file: Path, layer_name: str, output_dir: Path):
+def generate_solder_mask_svg(pcb_file: Path, layer_name: str, output_dir: Path, arc_error_nm=ARC_ERROR_NM, ctx=None):
     """Generate solder mask SVG (areas where solder mask should be removed)."""
     
     output_dir.mkdir(exist_ok=True)
     
-    # Load board
-    board = pcbnew.LoadBoard(str(pcb_file))
-    
-    # Get board bounding box for SVG dimensions
-    bbox = board.ComputeBoundingBox(False)
-    board_x_mm = pcbnew.ToMM(bbox.GetX())
-    board_y_mm = pcbnew.ToMM(bbox.GetY())
-    board_w_mm = pcbnew.ToMM(bbox.GetWidth())
-    board_h_mm = pcbnew.ToMM(bbox.GetHeight())
+    # Load board unless the caller already has it open
+    if ctx is None:
+        ctx = load_context(pcb_file)
+    board_x_mm, board_y_mm = ctx.board_x_mm, ctx.board_y_mm
+    board_w_mm, board_h_mm = ctx.board_w_mm, ctx.board_h_mm
     
     print(f"Processing solder mask for {layer_name}...")
     
@@ -361,689 +681,159 @@ def generate_solder_mask_svg(pcb_file: Path, layer_name: str, output_dir: Path):
     else:
         mask_layer = "B.Mask"
     
-    mask_layer_id = board.GetLayerID(mask_layer)
-    
     # Collect all solder mask openings
-    mask_openings = pcbnew.SHAPE_POLY_SET()
-    
-    # Add pad openings
-    pad_count = 0
-    for footprint in board.GetFootprints():
-        for pad in footprint.Pads():
-            if pad.IsOnLayer(mask_layer_id):
-                # Use default solder mask margin (typically 0.05mm)
-                # margin = pcbnew.FromMM(0.05)
-                margin = pcbnew.FromMM(0)
-                pad.TransformShapeToPolygon(mask_openings, mask_layer_id, margin, 10000, pcbnew.ERROR_INSIDE)
-                pad_count += 1
-    
-    # Add any explicit mask openings from zones
-    zone_count = 0
-    for zone in board.Zones():
-        if zone.IsOnLayer(mask_layer_id):
-            filled_polys = zone.GetFilledPolysList(mask_layer_id)
-            if filled_polys:
-                mask_openings.Append(filled_polys)
-            zone_count += 1
-    
-    # Add via openings - vias need solder mask removal on both sides
-    via_count = 0
-    for track in board.GetTracks():
-        if track.GetClass() == "PCB_VIA":
-            via = track
-            # Vias appear on both front and back mask layers
-            # Get via position and size
-            pos = via.GetPosition()
-            # Via size is the outer diameter (copper annular ring)
-            via_size = via.GetWidth()  # This is the copper diameter
-            
-            # Create a circle for the via opening
-            # Add solder mask expansion (typically same as pads)
-            margin = pcbnew.FromMM(0)  # Using same margin as pads
-            
-            # Create a circular shape for the via
-            via_shape = pcbnew.SHAPE_POLY_SET()
-            # We need to create a circle at the via position with radius = (via_size + margin) / 2
-            radius = (via_size + margin) / 2
-            
-            # Create circle using segments (KiCad uses polygons for circles)
-            circle_points = []
-            num_segments = 32  # Number of segments for circle approximation
-            import math
-            for i in range(num_segments):
-                angle = 2 * math.pi * i / num_segments
-                x = pos.x + int(radius * math.cos(angle))
-                y = pos.y + int(radius * math.sin(angle))
-                circle_points.append(pcbnew.VECTOR2I(x, y))
-            
-            # Create the polygon from points
-            via_poly = pcbnew.SHAPE_POLY_SET()
-            via_poly.NewOutline()
-            for pt in circle_points:
-                via_poly.Append(pt)
-            
-            mask_openings.Append(via_poly)
-            via_count += 1
+    mask_openings, mask_circles, pad_count, via_count, zone_count = _mask_openings(ctx, ctx.layer_id(mask_layer), arc_error_nm)
     
     print(f"  Mask openings: {pad_count} pads, {via_count} vias, {zone_count} zones")
-    print(f"  Total openings: {mask_openings.OutlineCount()} outlines")
+    print(f"  Total openings: {mask_openings.OutlineCount() + len(mask_circles)} outlines")
     
     # Convert to SVG
-    svg = ET.Element("svg")
-    svg.set("xmlns", SVG_NS)
-    svg.set("version", "1.1")
-    svg.set("width", f"{board_w_mm}mm")
-    svg.set("height", f"{board_h_mm}mm")
-    svg.set("viewBox", f"{board_x_mm} {board_y_mm} {board_w_mm} {board_h_mm}")
-    
-    # Create path element for mask openings
-    # Use yellow for mask layer
-    if mask_openings.OutlineCount() > 0:
-        path = ET.Element("path")
-        path.set("d", shape_poly_set_to_svg_path(mask_openings))
-        path.set("fill", "#ffff00")  # Yellow for mask
-        path.set("fill-rule", "evenodd")
-        svg.append(path)
-    
-    # Write SVG file
     output_file = output_dir / f"solder_mask_{layer_name.replace('.', '_')}.svg"
-    tree = ET.ElementTree(svg)
-    tree.write(str(output_file), encoding="utf-8", xml_declaration=True)
+    with SvgWriter(output_file) as svg:
+        svg.start_svg(board_x_mm, board_y_mm, board_w_mm, board_h_mm)
+        
+        # Create path element for mask openings
+        # Use yellow for mask layer
+        if mask_openings.OutlineCount() > 0:
+            svg.path(
+                shape_poly_set_to_svg_path(mask_openings),
+                fill="#ffff00",  # Yellow for mask
+                fill_rule="evenodd",
+            )
+        # Round openings go in their own path so evenodd never cuts overlaps
+        if mask_circles:
+            svg.path(_circles_path_data(mask_circles), fill="#ffff00")
     
     print(f"  Generated: {output_file}")
     
     return output_file
 
-def generate_user_comments_svg(pcb_file: Path, output_dir: Path):
+def generate_user_comments_svg(pcb_file: Path, output_dir: Path, ctx=None):
     """Generate User.Comments layer SVG (cutting/scoring lines)."""
     
     output_dir.mkdir(exist_ok=True)
     
-    # Load board
-    board = pcbnew.LoadBoard(str(pcb_file))
-    
-    # Get board bounding box for SVG dimensions
-    bbox = board.ComputeBoundingBox(False)
-    board_x_mm = pcbnew.ToMM(bbox.GetX())
-    board_y_mm = pcbnew.ToMM(bbox.GetY())
-    board_w_mm = pcbnew.ToMM(bbox.GetWidth())
-    board_h_mm = pcbnew.ToMM(bbox.GetHeight())
+    # Load board unless the caller already has it open
+    if ctx is None:
+        ctx = load_context(pcb_file)
+    board_x_mm, board_y_mm = ctx.board_x_mm, ctx.board_y_mm
+    board_w_mm, board_h_mm = ctx.board_w_mm, ctx.board_h_mm
     
     print("Processing User.Comments layer...")
     
-    # Get User.Comments layer ID
-    comments_layer_id = board.GetLayerID("User.Comments")
-    
     # Convert to SVG
-    svg = ET.Element("svg")
-    svg.set("xmlns", SVG_NS)
-    svg.set("version", "1.1")
-    svg.set("width", f"{board_w_mm}mm")
-    svg.set("height", f"{board_h_mm}mm")
-    svg.set("viewBox", f"{board_x_mm} {board_y_mm} {board_w_mm} {board_h_mm}")
-    
-    # Collect all drawings on User.Comments layer
-    drawing_count = 0
-    for drawing in board.GetDrawings():
-        if drawing.IsOnLayer(comments_layer_id):
-            if drawing.GetClass() == "PCB_SHAPE":
-                shape = drawing
-                shape_type = shape.GetShape()
-                
-                # Handle different shape types
-                if shape_type == pcbnew.SHAPE_T_SEGMENT:
-                    # Line segment
-                    start = shape.GetStart()
-                    end = shape.GetEnd()
-                    line = ET.Element("line")
-                    line.set("x1", f"{pcbnew.ToMM(start.x):.6f}")
-                    line.set("y1", f"{pcbnew.ToMM(start.y):.6f}")
-                    line.set("x2", f"{pcbnew.ToMM(end.x):.6f}")
-                    line.set("y2", f"{pcbnew.ToMM(end.y):.6f}")
-                    line.set("stroke", "#00befe")  # Cyan/light blue like contour
-                    line.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                    line.set("fill", "none")
-                    svg.append(line)
-                    drawing_count += 1
-                    
-                elif shape_type == pcbnew.SHAPE_T_RECT:
-                    # Rectangle
-                    start = shape.GetStart()
-                    end = shape.GetEnd()
-                    x = min(pcbnew.ToMM(start.x), pcbnew.ToMM(end.x))
-                    y = min(pcbnew.ToMM(start.y), pcbnew.ToMM(end.y))
-                    width = abs(pcbnew.ToMM(end.x) - pcbnew.ToMM(start.x))
-                    height = abs(pcbnew.ToMM(end.y) - pcbnew.ToMM(start.y))
-                    rect = ET.Element("rect")
-                    rect.set("x", f"{x:.6f}")
-                    rect.set("y", f"{y:.6f}")
-                    rect.set("width", f"{width:.6f}")
-                    rect.set("height", f"{height:.6f}")
-                    rect.set("stroke", "#00befe")
-                    rect.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                    rect.set("fill", "none")
-                    svg.append(rect)
-                    drawing_count += 1
-                    
-                elif shape_type == pcbnew.SHAPE_T_CIRCLE:
-                    # Circle
-                    center = shape.GetCenter()
-                    radius = shape.GetRadius()
-                    circle = ET.Element("circle")
-                    circle.set("cx", f"{pcbnew.ToMM(center.x):.6f}")
-                    circle.set("cy", f"{pcbnew.ToMM(center.y):.6f}")
-                    circle.set("r", f"{pcbnew.ToMM(radius):.6f}")
-                    circle.set("stroke", "#00befe")
-                    circle.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                    circle.set("fill", "none")
-                    svg.append(circle)
-                    drawing_count += 1
-                    
-                elif shape_type == pcbnew.SHAPE_T_POLY:
-                    # Polygon/polyline
-                    poly_shape = shape.GetPolyShape()
-                    if poly_shape and poly_shape.OutlineCount() > 0:
-                        path_data = shape_poly_set_to_svg_path(poly_shape)
-                        path = ET.Element("path")
-                        path.set("d", path_data)
-                        path.set("stroke", "#00befe")
-                        path.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                        path.set("fill", "none")
-                        svg.append(path)
-                        drawing_count += 1
-    
-    print(f"  Found {drawing_count} shapes on User.Comments")
-    
-    # Write SVG file
     output_file = output_dir / "user_comments.svg"
-    tree = ET.ElementTree(svg)
-    tree.write(str(output_file), encoding="utf-8", xml_declaration=True)
+    with SvgWriter(output_file) as svg:
+        svg.start_svg(board_x_mm, board_y_mm, board_w_mm, board_h_mm)
+        
+        # Collect all drawings on User.Comments layer
+        drawing_count = _write_user_comments(svg, ctx)
+        
+        print(f"  Found {drawing_count} shapes on User.Comments")
     
     print(f"  Generated: {output_file}")
     
     return output_file
 
-def generate_multi_color_svg(pcb_file: Path, output_dir: Path, layers: list = ["F.Cu"]):
-    """Generate a single multi-color SVG with all layers for XCS import."""
-    
-    output_dir.mkdir(exist_ok=True)
-    
-    # Load board
-    board = pcbnew.LoadBoard(str(pcb_file))
-    
-    # Get board bounding box for SVG dimensions
-    bbox = board.ComputeBoundingBox(False)
-    board_x_mm = pcbnew.ToMM(bbox.GetX())
-    board_y_mm = pcbnew.ToMM(bbox.GetY())
-    board_w_mm = pcbnew.ToMM(bbox.GetWidth())
-    board_h_mm = pcbnew.ToMM(bbox.GetHeight())
+def _generate_multi_color(ctx, output_file: Path, layers: list, mirror_center_x=None, arc_error_nm=ARC_ERROR_NM):
+    """Write one multi-color SVG for the given copper layers.
+
+    Front and back share this pass; the back passes the board centre as
+    mirror_center_x so every X coordinate is mirrored across it.
+    """
+    board_x_mm, board_y_mm = ctx.board_x_mm, ctx.board_y_mm
+    board_w_mm, board_h_mm = ctx.board_w_mm, ctx.board_h_mm
     
-    print("Generating multi-color SVG...")
     print(f"  Board: ({board_x_mm:.2f}, {board_y_mm:.2f}) {board_w_mm:.2f}x{board_h_mm:.2f}mm")
     
-    # Create main SVG
-    svg = ET.Element("svg")
-    svg.set("xmlns", SVG_NS)
-    svg.set("version", "1.1")
-    svg.set("width", f"{board_w_mm}mm")
-    svg.set("height", f"{board_h_mm}mm")
-    svg.set("viewBox", f"{board_x_mm} {board_y_mm} {board_w_mm} {board_h_mm}")
-    
-    # Get board outline
-    board_outline = pcbnew.SHAPE_POLY_SET()
-    board.GetBoardPolygonOutlines(board_outline, True)
-    
-    # 1. Add edge cuts (green stroke for contour layer)
-    edge_path = ET.Element("path")
-    edge_path.set("d", shape_poly_set_to_svg_path(board_outline))
-    edge_path.set("fill", "none")
-    edge_path.set("stroke", "#00ff00")  # Green for contour
-    edge_path.set("stroke-width", "0.1")
-    svg.append(edge_path)
-    
-    # 2. Add isolation for each copper layer (black for traces)
-    for layer_name in layers:
-        board_area = pcbnew.SHAPE_POLY_SET(board_outline)
-        copper_shapes = pcbnew.SHAPE_POLY_SET()
-        layer_id = board.GetLayerID(layer_name)
+    with SvgWriter(output_file) as svg:
+        svg.start_svg(board_x_mm, board_y_mm, board_w_mm, board_h_mm)
         
-        # Add tracks
-        for track in board.GetTracks():
-            if track.IsOnLayer(layer_id):
-                track.TransformShapeToPolygon(copper_shapes, layer_id, 0, 10000, pcbnew.ERROR_INSIDE)
+        # Get board outline
+        board_outline = ctx.board_outline
         
-        # Add pads
-        for footprint in board.GetFootprints():
-            for pad in footprint.Pads():
-                if pad.IsOnLayer(layer_id):
-                    pad.TransformShapeToPolygon(copper_shapes, layer_id, 0, 10000, pcbnew.ERROR_INSIDE)
+        # Resolve layer IDs up front; layers on the same side share one mask
+        copper_layer_ids = [ctx.layer_id(layer_name) for layer_name in layers]
+        mask_layer_ids = list(dict.fromkeys(
+            ctx.layer_id("F.Mask" if "F" in layer_name else "B.Mask") for layer_name in layers
+        ))
         
-        # Add zones
-        for zone in board.Zones():
-            if zone.IsOnLayer(layer_id):
-                filled_polys = zone.GetFilledPolysList(layer_id)
-                if filled_polys:
-                    copper_shapes.Append(filled_polys)
+        # 1. Add edge cuts (green stroke for contour layer)
+        svg.path(
+            ctx.outline_path(mirror_center_x),
+            fill="none",
+            stroke="#00ff00",  # Green for contour
+            stroke_width="0.1",
+        )
         
-        # Boolean subtraction: board - copper = isolation
-        isolation = pcbnew.SHAPE_POLY_SET(board_area)
-        isolation.BooleanSubtract(copper_shapes)
-        
-        if isolation.OutlineCount() > 0:
-            isolation_path = ET.Element("path")
-            isolation_path.set("d", shape_poly_set_to_svg_path(isolation))
-            isolation_path.set("fill", "#000000")  # Black for traces
-            isolation_path.set("fill-rule", "evenodd")
-            svg.append(isolation_path)
-    
-    # 3. Add drill holes (orange for holes layer)
-    hole_count = 0
-    for footprint in board.GetFootprints():
-        for pad in footprint.Pads():
-            drill_size = pad.GetDrillSize()
-            if drill_size.x > 0 and drill_size.y > 0:
-                pos = pad.GetPosition()
-                x_mm = pcbnew.ToMM(pos.x)
-                y_mm = pcbnew.ToMM(pos.y)
-                
-                if drill_size.x == drill_size.y:
-                    # Circular hole
-                    radius_mm = pcbnew.ToMM(drill_size.x) / 2
-                    circle = ET.Element("circle")
-                    circle.set("cx", f"{x_mm:.6f}")
-                    circle.set("cy", f"{y_mm:.6f}")
-                    circle.set("r", f"{radius_mm:.6f}")
-                    circle.set("fill", "#ff7f56")  # Orange for holes
-                    svg.append(circle)
-                    hole_count += 1
-    
-    # Add vias
-    for track in board.GetTracks():
-        if track.GetClass() == "PCB_VIA":
-            via = track
-            drill_value = via.GetDrillValue()
-            if drill_value > 0:
-                pos = via.GetPosition()
-                x_mm = pcbnew.ToMM(pos.x)
-                y_mm = pcbnew.ToMM(pos.y)
-                radius_mm = pcbnew.ToMM(drill_value) / 2
-                
-                circle = ET.Element("circle")
-                circle.set("cx", f"{x_mm:.6f}")
-                circle.set("cy", f"{y_mm:.6f}")
-                circle.set("r", f"{radius_mm:.6f}")
-                circle.set("fill", "#ff7f56")  # Orange for holes
-                svg.append(circle)
-                hole_count += 1
-    
-    # 4. Add solder mask (yellow for mask layer)
-    for layer_name in layers:
-        if "F" in layer_name:
-            mask_layer = "F.Mask"
-        else:
-            mask_layer = "B.Mask"
+        # 2. Add isolation for each copper layer (black for traces)
+        for layer_id in copper_layer_ids:
+            copper_shapes = _collect_copper_shapes(ctx, layer_id, ctx.outline_bbox, arc_error_nm)[0]
+            
+            # Boolean subtraction: board - copper = isolation
+            isolation = _boolean_subtract(board_outline, copper_shapes)
+            
+            if isolation.OutlineCount() > 0:
+                svg.path(
+                    shape_poly_set_to_svg_path(isolation, mirror_center_x=mirror_center_x),
+                    fill="#000000",  # Black for traces
+                    fill_rule="evenodd",
+                )
         
-        mask_layer_id = board.GetLayerID(mask_layer)
-        mask_openings = pcbnew.SHAPE_POLY_SET()
+        # 3. Add drill holes (orange for holes layer); slots are left out
+        pad_holes, _, via_holes = ctx.drill_holes
+        holes = pad_holes + via_holes
+        mirror = None if mirror_center_x is None else 2.0 * float(mirror_center_x)
+        if holes:
+            svg.path(_circles_path_data(holes, mirror=mirror), fill="#ff7f56")  # Orange for holes
         
-        for footprint in board.GetFootprints():
-            for pad in footprint.Pads():
-                if pad.IsOnLayer(mask_layer_id):
-                    margin = pcbnew.FromMM(0)
-                    pad.TransformShapeToPolygon(mask_openings, mask_layer_id, margin, 10000, pcbnew.ERROR_INSIDE)
+        # 4. Add solder mask (yellow for mask layer)
+        for mask_layer_id in mask_layer_ids:
+            mask_openings, mask_circles = _mask_openings(ctx, mask_layer_id, arc_error_nm, include_zones=False)[:2]
+            
+            if mask_openings.OutlineCount() > 0:
+                svg.path(
+                    shape_poly_set_to_svg_path(mask_openings, mirror_center_x=mirror_center_x),
+                    fill="#ffff00",  # Yellow for mask
+                    fill_rule="evenodd",
+                )
+            if mask_circles:
+                svg.path(_circles_path_data(mask_circles, mirror=mirror), fill="#ffff00")
         
-        # Add via openings to mask
-        import math
-        for track in board.GetTracks():
-            if track.GetClass() == "PCB_VIA":
-                via = track
-                pos = via.GetPosition()
-                via_size = via.GetWidth()
-                margin = pcbnew.FromMM(0)
-                radius = (via_size + margin) / 2
-                
-                # Create circle using segments
-                circle_points = []
-                num_segments = 32
-                for i in range(num_segments):
-                    angle = 2 * math.pi * i / num_segments
-                    x = pos.x + int(radius * math.cos(angle))
-                    y = pos.y + int(radius * math.sin(angle))
-                    circle_points.append(pcbnew.VECTOR2I(x, y))
-                
-                via_poly = pcbnew.SHAPE_POLY_SET()
-                via_poly.NewOutline()
-                for pt in circle_points:
-                    via_poly.Append(pt)
-                
-                mask_openings.Append(via_poly)
+        # 5. Add User.Comments layer (cyan/blue for additional cutting/scoring)
+        comments_count = _write_user_comments(svg, ctx, mirror_center_x=mirror_center_x)
         
-        if mask_openings.OutlineCount() > 0:
-            mask_path = ET.Element("path")
-            mask_path.set("d", shape_poly_set_to_svg_path(mask_openings))
-            mask_path.set("fill", "#ffff00")  # Yellow for mask
-            mask_path.set("fill-rule", "evenodd")
-            svg.append(mask_path)
-    
-    # 5. Add User.Comments layer (cyan/blue for additional cutting/scoring)
-    comments_layer_id = board.GetLayerID("User.Comments")
-    comments_count = 0
-    for drawing in board.GetDrawings():
-        if drawing.IsOnLayer(comments_layer_id):
-            if drawing.GetClass() == "PCB_SHAPE":
-                shape = drawing
-                shape_type = shape.GetShape()
-                
-                if shape_type == pcbnew.SHAPE_T_SEGMENT:
-                    start = shape.GetStart()
-                    end = shape.GetEnd()
-                    line = ET.Element("line")
-                    line.set("x1", f"{pcbnew.ToMM(start.x):.6f}")
-                    line.set("y1", f"{pcbnew.ToMM(start.y):.6f}")
-                    line.set("x2", f"{pcbnew.ToMM(end.x):.6f}")
-                    line.set("y2", f"{pcbnew.ToMM(end.y):.6f}")
-                    line.set("stroke", "#00befe")  # Cyan like contour
-                    line.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                    line.set("fill", "none")
-                    svg.append(line)
-                    comments_count += 1
-                elif shape_type == pcbnew.SHAPE_T_RECT:
-                    start = shape.GetStart()
-                    end = shape.GetEnd()
-                    x = min(pcbnew.ToMM(start.x), pcbnew.ToMM(end.x))
-                    y = min(pcbnew.ToMM(start.y), pcbnew.ToMM(end.y))
-                    width = abs(pcbnew.ToMM(end.x) - pcbnew.ToMM(start.x))
-                    height = abs(pcbnew.ToMM(end.y) - pcbnew.ToMM(start.y))
-                    rect = ET.Element("rect")
-                    rect.set("x", f"{x:.6f}")
-                    rect.set("y", f"{y:.6f}")
-                    rect.set("width", f"{width:.6f}")
-                    rect.set("height", f"{height:.6f}")
-                    rect.set("stroke", "#00befe")
-                    rect.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                    rect.set("fill", "none")
-                    svg.append(rect)
-                    comments_count += 1
-                elif shape_type == pcbnew.SHAPE_T_CIRCLE:
-                    center = shape.GetCenter()
-                    radius = shape.GetRadius()
-                    circle = ET.Element("circle")
-                    circle.set("cx", f"{pcbnew.ToMM(center.x):.6f}")
-                    circle.set("cy", f"{pcbnew.ToMM(center.y):.6f}")
-                    circle.set("r", f"{pcbnew.ToMM(radius):.6f}")
-                    circle.set("stroke", "#00befe")
-                    circle.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                    circle.set("fill", "none")
-                    svg.append(circle)
-                    comments_count += 1
-                elif shape_type == pcbnew.SHAPE_T_POLY:
-                    poly_shape = shape.GetPolyShape()
-                    if poly_shape and poly_shape.OutlineCount() > 0:
-                        path_data = shape_poly_set_to_svg_path(poly_shape)
-                        path = ET.Element("path")
-                        path.set("d", path_data)
-                        path.set("stroke", "#00befe")
-                        path.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                        path.set("fill", "none")
-                        svg.append(path)
-                        comments_count += 1
-    
-    print(f"  Added {hole_count} drill holes")
-    print(f"  Added {comments_count} User.Comments shapes")
-    print(f"  Added isolation, edge cuts, and solder mask")
-    
-    # Write SVG file
-    output_file = output_dir / "multi_color_pcb.svg"
-    tree = ET.ElementTree(svg)
-    tree.write(str(output_file), encoding="utf-8", xml_declaration=True)
+        print(f"  Added {len(holes)} drill holes")
+        print(f"  Added {comments_count} User.Comments shapes")
     
     print(f"  Generated: {output_file}")
     
     return output_file
 
-def generate_multi_color_svg_back(pcb_file: Path, output_dir: Path, layers: list = ["B.Cu"]):
-    """Generate a single multi-color SVG with all back layers for XCS import (mirrored)."""
+def generate_multi_color_svg(pcb_file: Path, output_dir: Path, layers: list = ["F.Cu"], arc_error_nm=ARC_ERROR_NM, ctx=None):
+    """Generate a single multi-color SVG with all layers for XCS import."""
     
     output_dir.mkdir(exist_ok=True)
     
-    # Load board
-    board = pcbnew.LoadBoard(str(pcb_file))
+    # Load board unless the caller already has it open
+    if ctx is None:
+        ctx = load_context(pcb_file)
     
-    # Get board bounding box for SVG dimensions
-    bbox = board.ComputeBoundingBox(False)
-    board_x_mm = pcbnew.ToMM(bbox.GetX())
-    board_y_mm = pcbnew.ToMM(bbox.GetY())
-    board_w_mm = pcbnew.ToMM(bbox.GetWidth())
-    board_h_mm = pcbnew.ToMM(bbox.GetHeight())
-    board_center_x = board_x_mm + board_w_mm / 2
+    print("Generating multi-color SVG...")
     
-    print("Generating multi-color SVG for back layers (mirrored)...")
-    print(f"  Board: ({board_x_mm:.2f}, {board_y_mm:.2f}) {board_w_mm:.2f}x{board_h_mm:.2f}mm")
+    return _generate_multi_color(ctx, output_dir / "multi_color_pcb.svg", layers, arc_error_nm=arc_error_nm)
+
+def generate_multi_color_svg_back(pcb_file: Path, output_dir: Path, layers: list = ["B.Cu"], arc_error_nm=ARC_ERROR_NM, ctx=None):
+    """Generate a single multi-color SVG with all back layers for XCS import (mirrored)."""
     
-    # Create main SVG
-    svg = ET.Element("svg")
-    svg.set("xmlns", SVG_NS)
-    svg.set("version", "1.1")
-    svg.set("width", f"{board_w_mm}mm")
-    svg.set("height", f"{board_h_mm}mm")
-    svg.set("viewBox", f"{board_x_mm} {board_y_mm} {board_w_mm} {board_h_mm}")
+    output_dir.mkdir(exist_ok=True)
     
-    # Get board outline
-    board_outline = pcbnew.SHAPE_POLY_SET()
-    board.GetBoardPolygonOutlines(board_outline, True)
-    
-    # 1. Add edge cuts (green stroke for contour layer) - mirrored
-    edge_path = ET.Element("path")
-    edge_path.set("d", shape_poly_set_to_svg_path_mirrored(board_outline, board_center_x))
-    edge_path.set("fill", "none")
-    edge_path.set("stroke", "#00ff00")  # Green for contour
-    edge_path.set("stroke-width", "0.1")
-    svg.append(edge_path)
-    
-    # 2. Add isolation for each back copper layer (black for traces) - mirrored
-    for layer_name in layers:
-        if "B." in layer_name:
-            board_area = pcbnew.SHAPE_POLY_SET(board_outline)
-            copper_shapes = pcbnew.SHAPE_POLY_SET()
-            layer_id = board.GetLayerID(layer_name)
-            
-            # Add tracks
-            for track in board.GetTracks():
-                if track.IsOnLayer(layer_id):
-                    track.TransformShapeToPolygon(copper_shapes, layer_id, 0, 10000, pcbnew.ERROR_INSIDE)
-            
-            # Add pads
-            for footprint in board.GetFootprints():
-                for pad in footprint.Pads():
-                    if pad.IsOnLayer(layer_id):
-                        pad.TransformShapeToPolygon(copper_shapes, layer_id, 0, 10000, pcbnew.ERROR_INSIDE)
-            
-            # Add zones
-            for zone in board.Zones():
-                if zone.IsOnLayer(layer_id):
-                    filled_polys = zone.GetFilledPolysList(layer_id)
-                    if filled_polys:
-                        copper_shapes.Append(filled_polys)
-            
-            # Boolean subtraction: board - copper = isolation
-            isolation = pcbnew.SHAPE_POLY_SET(board_area)
-            isolation.BooleanSubtract(copper_shapes)
-            
-            if isolation.OutlineCount() > 0:
-                isolation_path = ET.Element("path")
-                isolation_path.set("d", shape_poly_set_to_svg_path_mirrored(isolation, board_center_x))
-                isolation_path.set("fill", "#000000")  # Black for traces
-                isolation_path.set("fill-rule", "evenodd")
-                svg.append(isolation_path)
-    
-    # 3. Add drill holes (orange for holes layer) - mirrored positions
-    hole_count = 0
-    for footprint in board.GetFootprints():
-        for pad in footprint.Pads():
-            drill_size = pad.GetDrillSize()
-            if drill_size.x > 0 and drill_size.y > 0:
-                pos = pad.GetPosition()
-                x_mm = pcbnew.ToMM(pos.x)
-                y_mm = pcbnew.ToMM(pos.y)
-                x_mirrored = 2 * board_center_x - x_mm
-                
-                if drill_size.x == drill_size.y:
-                    # Circular hole
-                    radius_mm = pcbnew.ToMM(drill_size.x) / 2
-                    circle = ET.Element("circle")
-                    circle.set("cx", f"{x_mirrored:.6f}")
-                    circle.set("cy", f"{y_mm:.6f}")
-                    circle.set("r", f"{radius_mm:.6f}")
-                    circle.set("fill", "#ff7f56")  # Orange for holes
-                    svg.append(circle)
-                    hole_count += 1
-    
-    # Add vias - mirrored positions
-    for track in board.GetTracks():
-        if track.GetClass() == "PCB_VIA":
-            via = track
-            drill_value = via.GetDrillValue()
-            if drill_value > 0:
-                pos = via.GetPosition()
-                x_mm = pcbnew.ToMM(pos.x)
-                y_mm = pcbnew.ToMM(pos.y)
-                x_mirrored = 2 * board_center_x - x_mm
-                radius_mm = pcbnew.ToMM(drill_value) / 2
-                
-                circle = ET.Element("circle")
-                circle.set("cx", f"{x_mirrored:.6f}")
-                circle.set("cy", f"{y_mm:.6f}")
-                circle.set("r", f"{radius_mm:.6f}")
-                circle.set("fill", "#ff7f56")  # Orange for holes
-                svg.append(circle)
-                hole_count += 1
-    
-    # 4. Add solder mask for back layers (yellow for mask layer) - mirrored
-    for layer_name in layers:
-        if "B." in layer_name:
-            mask_layer = "B.Mask"
-            mask_layer_id = board.GetLayerID(mask_layer)
-            mask_openings = pcbnew.SHAPE_POLY_SET()
-            
-            for footprint in board.GetFootprints():
-                for pad in footprint.Pads():
-                    if pad.IsOnLayer(mask_layer_id):
-                        margin = pcbnew.FromMM(0)
-                        pad.TransformShapeToPolygon(mask_openings, mask_layer_id, margin, 10000, pcbnew.ERROR_INSIDE)
-            
-            # Add via openings to mask - vias need openings on both sides
-            import math
-            for track in board.GetTracks():
-                if track.GetClass() == "PCB_VIA":
-                    via = track
-                    pos = via.GetPosition()
-                    via_size = via.GetWidth()  # This is the copper diameter
-                    margin = pcbnew.FromMM(0)
-                    radius = (via_size + margin) / 2
-                    
-                    # Create circle using segments (KiCad uses polygons for circles)
-                    circle_points = []
-                    num_segments = 32
-                    for i in range(num_segments):
-                        angle = 2 * math.pi * i / num_segments
-                        x = pos.x + int(radius * math.cos(angle))
-                        y = pos.y + int(radius * math.sin(angle))
-                        circle_points.append(pcbnew.VECTOR2I(x, y))
-                    
-                    via_poly = pcbnew.SHAPE_POLY_SET()
-                    via_poly.NewOutline()
-                    for pt in circle_points:
-                        via_poly.Append(pt)
-                    
-                    mask_openings.Append(via_poly)
-            
-            if mask_openings.OutlineCount() > 0:
-                mask_path = ET.Element("path")
-                mask_path.set("d", shape_poly_set_to_svg_path_mirrored(mask_openings, board_center_x))
-                mask_path.set("fill", "#ffff00")  # Yellow for mask
-                mask_path.set("fill-rule", "evenodd")
-                svg.append(mask_path)
-    
-    # 5. Add User.Comments layer (cyan/blue) - mirrored
-    comments_layer_id = board.GetLayerID("User.Comments")
-    comments_count = 0
-    for drawing in board.GetDrawings():
-        if drawing.IsOnLayer(comments_layer_id):
-            if drawing.GetClass() == "PCB_SHAPE":
-                shape = drawing
-                shape_type = shape.GetShape()
-                
-                if shape_type == pcbnew.SHAPE_T_SEGMENT:
-                    start = shape.GetStart()
-                    end = shape.GetEnd()
-                    start_x_mirrored = 2 * board_center_x - pcbnew.ToMM(start.x)
-                    end_x_mirrored = 2 * board_center_x - pcbnew.ToMM(end.x)
-                    line = ET.Element("line")
-                    line.set("x1", f"{start_x_mirrored:.6f}")
-                    line.set("y1", f"{pcbnew.ToMM(start.y):.6f}")
-                    line.set("x2", f"{end_x_mirrored:.6f}")
-                    line.set("y2", f"{pcbnew.ToMM(end.y):.6f}")
-                    line.set("stroke", "#00befe")  # Cyan like contour
-                    line.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                    line.set("fill", "none")
-                    svg.append(line)
-                    comments_count += 1
-                elif shape_type == pcbnew.SHAPE_T_RECT:
-                    start = shape.GetStart()
-                    end = shape.GetEnd()
-                    start_x_mm = pcbnew.ToMM(start.x)
-                    end_x_mm = pcbnew.ToMM(end.x)
-                    # Mirror the x coordinates
-                    start_x_mirrored = 2 * board_center_x - start_x_mm
-                    end_x_mirrored = 2 * board_center_x - end_x_mm
-                    x = min(start_x_mirrored, end_x_mirrored)
-                    y = min(pcbnew.ToMM(start.y), pcbnew.ToMM(end.y))
-                    width = abs(end_x_mirrored - start_x_mirrored)
-                    height = abs(pcbnew.ToMM(end.y) - pcbnew.ToMM(start.y))
-                    rect = ET.Element("rect")
-                    rect.set("x", f"{x:.6f}")
-                    rect.set("y", f"{y:.6f}")
-                    rect.set("width", f"{width:.6f}")
-                    rect.set("height", f"{height:.6f}")
-                    rect.set("stroke", "#00befe")
-                    rect.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                    rect.set("fill", "none")
-                    svg.append(rect)
-                    comments_count += 1
-                elif shape_type == pcbnew.SHAPE_T_CIRCLE:
-                    center = shape.GetCenter()
-                    radius = shape.GetRadius()
-                    center_x_mirrored = 2 * board_center_x - pcbnew.ToMM(center.x)
-                    circle = ET.Element("circle")
-                    circle.set("cx", f"{center_x_mirrored:.6f}")
-                    circle.set("cy", f"{pcbnew.ToMM(center.y):.6f}")
-                    circle.set("r", f"{pcbnew.ToMM(radius):.6f}")
-                    circle.set("stroke", "#00befe")
-                    circle.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                    circle.set("fill", "none")
-                    svg.append(circle)
-                    comments_count += 1
-                elif shape_type == pcbnew.SHAPE_T_POLY:
-                    poly_shape = shape.GetPolyShape()
-                    if poly_shape and poly_shape.OutlineCount() > 0:
-                        path_data = shape_poly_set_to_svg_path_mirrored(poly_shape, board_center_x)
-                        path = ET.Element("path")
-                        path.set("d", path_data)
-                        path.set("stroke", "#00befe")
-                        path.set("stroke-width", f"{pcbnew.ToMM(shape.GetWidth()):.3f}")
-                        path.set("fill", "none")
-                        svg.append(path)
-                        comments_count += 1
-    
-    print(f"  Added {hole_count} drill holes")
-    print(f"  Added {comments_count} User.Comments shapes")
-    print(f"  Added isolation, edge cuts, and solder mask for back layers")
-    
-    # Write SVG file
-    output_file = output_dir / "multi_color_pcb_back.svg"
-    tree = ET.ElementTree(svg)
-    tree.write(str(output_file), encoding="utf-8", xml_declaration=True)
+    # Load board unless the caller already has it open
+    if ctx is None:
+        ctx = load_context(pcb_file)
     
-    print(f"  Generated: {output_file}")
+    print("Generating multi-color SVG for back layers (mirrored)...")
     
-    return output_file
\ No newline at end of file
+    back_layers = [layer_name for layer_name in layers if layer_name.startswith("B.")]
+    return _generate_multi_color(ctx, output_dir / "multi_color_pcb_back.svg", back_layers,
+                                 mirror_center_x=ctx.board_center_x, arc_error_nm=arc_error_nm)
\ No newline at end of file
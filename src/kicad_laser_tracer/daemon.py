@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Persistent KiCad Python worker for repeated CLI runs.
+
+Importing pcbnew dominates the start-up time of every run. When
+KICAD_LASER_TRACER_DAEMON is set, the CLI starts this module once under
+KiCad's Python, where it keeps pcbnew loaded and serves jobs over a Unix
+socket. Later invocations become thin clients. The daemon exits after
+sitting idle for IDLE_TIMEOUT seconds.
+
+Requests and replies are single JSON lines, so nothing received over the
+socket is ever unpickled. The socket lives in a per-user directory and
+is only accessible by its owner.
+"""
+
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+import time
+
+# Seconds without a job before the daemon shuts itself down
+IDLE_TIMEOUT = 600
+
+# How long a client waits for a freshly spawned daemon to import pcbnew
+STARTUP_TIMEOUT = 60
+
+
+def socket_path():
+    """Return the per-user path of the daemon's Unix socket.
+
+    Returns None when the fallback directory under the temp dir is not
+    safely ours, so callers run without the daemon.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir:
+        # Fall back to a private directory under the temp dir
+        runtime_dir = os.path.join(tempfile.gettempdir(), f"kicad-laser-tracer-{os.getuid()}")
+        try:
+            os.makedirs(runtime_dir, mode=0o700, exist_ok=True)
+            st = os.lstat(runtime_dir)
+        except OSError:
+            return None
+        # Anyone can pre-create a name in the shared temp dir, so only trust
+        # a real directory that we own and nobody else can enter
+        if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid()
+                or stat.S_IMODE(st.st_mode) != 0o700):
+            return None
+    return os.path.join(runtime_dir, 'klt.sock')
+
+
+def is_supported():
+    """Check whether this platform has what the daemon needs."""
+    return hasattr(socket, 'AF_UNIX') and hasattr(os, 'posix_spawn')
+
+
+def _connect(path):
+    """Connect to a running daemon, or return None if there isn't one."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _spawn_daemon():
+    """Start a detached daemon under KiCad's Python and return its pid."""
+    from .cli import build_kicad_python_command
+
+    kicad_python, cmd, env = build_kicad_python_command([], module='kicad_laser_tracer.daemon')
+    file_actions = [
+        (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+        (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+        (os.POSIX_SPAWN_DUP2, 1, 2),
+    ]
+    # setsid detaches the daemon from our terminal and process group
+    return os.posix_spawn(kicad_python, cmd, env, file_actions=file_actions, setsid=True)
+
+
+def _wait_for_daemon(path, pid):
+    """Wait for a spawned daemon to start listening, or return None if it died."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        sock = _connect(path)
+        if sock is not None:
+            return sock
+        exited, _ = os.waitpid(pid, os.WNOHANG)
+        if exited:
+            return None
+        time.sleep(0.1)
+    return None
+
+
+def run_via_daemon(argv):
+    """Run the CLI arguments in the daemon, starting it if needed.
+
+    Returns the job's exit code, or None when no daemon could be reached so
+    the caller can fall back to running the job itself.
+    """
+    if not is_supported():
+        return None
+
+    path = socket_path()
+    if path is None:
+        return None
+    sock = _connect(path)
+    if sock is None:
+        from .cli import KiCadPythonNotFoundError
+        try:
+            pid = _spawn_daemon()
+        except (KiCadPythonNotFoundError, OSError):
+            # The normal run reports the problem itself
+            return None
+        sock = _wait_for_daemon(path, pid)
+        if sock is None:
+            return None
+
+    request = {'argv': list(argv), 'cwd': os.getcwd()}
+    with sock:
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+
+    if not line:
+        return None
+
+    reply = json.loads(line)
+    sys.stdout.write(reply['stdout'])
+    sys.stderr.write(reply['stderr'])
+    return reply['code']
+
+
+def _run_job(argv, cwd):
+    """Run one CLI invocation in this process and return (code, stdout, stderr)."""
+    import contextlib
+    import io
+    import traceback
+
+    from .cli import build_parser, run
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    code = 0
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            os.chdir(cwd)
+            args = build_parser(prog='kicad-laser-tracer').parse_args(argv)
+            # Worker processes would each re-import pcbnew, which is exactly
+            # what the daemon is here to avoid, so run in-process by default
+            if args.jobs is None:
+                args.jobs = 1
+            run(args)
+        except SystemExit as e:
+            if isinstance(e.code, int) or e.code is None:
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+def _bind(path):
+    """Bind the daemon socket, clearing a stale one. Returns None if a daemon is already up."""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(path)
+    except OSError:
+        live = _connect(path)
+        if live is not None:
+            live.close()
+            server.close()
+            return None
+        # Left behind by a daemon that didn't shut down cleanly
+        os.unlink(path)
+        server.bind(path)
+    os.chmod(path, 0o600)
+    return server
+
+
+def serve(idle_timeout=IDLE_TIMEOUT):
+    """Serve jobs until no request arrives for idle_timeout seconds."""
+    # The whole point: pay for the pcbnew import once
+    from . import core  # noqa: F401
+
+    path = socket_path()
+    if path is None:
+        return
+    server = _bind(path)
+    if server is None:
+        return
+
+    server.listen()
+    server.settimeout(idle_timeout)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                break
+
+            with conn:
+                with conn.makefile('rb') as reader:
+                    line = reader.readline()
+                if not line:
+                    continue
+                try:
+                    request = json.loads(line)
+                    argv, cwd = request['argv'], request['cwd']
+                except (ValueError, KeyError, TypeError) as e:
+                    # A bad request gets an error reply, not a dead daemon
+                    reply = {'code': 1, 'stdout': '', 'stderr': f"Invalid daemon request: {e}\n"}
+                else:
+                    code, stdout, stderr = _run_job(argv, cwd)
+                    reply = {'code': code, 'stdout': stdout, 'stderr': stderr}
+                conn.sendall(json.dumps(reply).encode() + b'\n')
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    serve()